@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+
+import sys, time
+from swift.batch import EXTENSIONS, find_files, ingest
+
+def report(result):
+    if result.error:
+        print >> sys.stderr, "%s FAILED after %.3fs: %s" % (result.filename, result.seconds, result.error)
+        return
+    print >> sys.stderr, "%s %s %6d stmts %8d txns %4d quarantined  %.3fs  %.1f MB/s" % (
+        result.filename, result.parser, result.statements, result.transactions, result.quarantined,
+        result.seconds, result.size / 1048576.0 / max(result.seconds, 1e-9))
+
+def summary(results, elapsed):
+    size = sum(r.size for r in results)
+    transactions = sum(r.transactions for r in results)
+    print >> sys.stderr, "%d files (%d failed), %d stmts, %d txns in %.3fs: %.1f files/s %.0f txns/s %.1f MB/s" % (
+        len(results), len([r for r in results if r.error]), sum(r.statements for r in results),
+        transactions, elapsed, len(results) / elapsed, transactions / elapsed, size / 1048576.0 / elapsed)
+
+if __name__ == '__main__':
+    import argparse
+    arguments = argparse.ArgumentParser(description="Parse many statement files into NDJSON")
+    arguments.add_argument('paths', nargs='*', default=['download'],
+                           help="globs or directories (searched for %s files)" % ', '.join(sorted(EXTENSIONS)))
+    arguments.add_argument('-j', '--workers', type=int, default=None, help="worker processes, all cores by default")
+    arguments.add_argument('-o', '--output-dir', help="write one .ndjson per file here instead of stdout")
+    arguments.add_argument('--transactions', action='store_true', help="one line per transaction")
+    arguments.add_argument('--tolerant', action='store_true', help="quarantine bad statements instead of failing the file")
+    options = arguments.parse_args()
+
+    filenames = find_files(options.paths)
+    start = time.time()
+    results = []
+    for result in ingest(filenames, sys.stdout, workers=options.workers, output_dir=options.output_dir,
+                         transactions=options.transactions, tolerant=options.tolerant):
+        results.append(result)
+        report(result)
+    if results:
+        summary(results, time.time() - start)
+    sys.exit(1 if any(r.error for r in results) else 0)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+
+import json, os, resource, shutil, sys, tempfile, time
+from swift import SwiftReader, NDJSONWriter
+from swift.MT940 import MT940Parser
+from swift.TabaSK import TabaParser940, TabaParser942
+from swift.synthetic import Generator, write_file
+
+# (parser, file kind, statements per size); each statement has 50 transactions
+CASES = [
+    (TabaParser940, 'mt940', [10, 100, 1000]),
+    (TabaParser942, 'mt942', [10, 100, 1000]),
+    (MT940Parser, 'mt940-swift', [10, 100, 1000]),
+]
+TRANSACTIONS = 50
+
+def generate(kind, statements, filename):
+    generator = Generator(seed=statements)
+    if kind == 'mt940':
+        lines = generator.mt940(statements, TRANSACTIONS)
+    elif kind == 'mt942':
+        lines = generator.mt942(statements, TRANSACTIONS)
+    else:
+        lines = generator.mt940(statements, TRANSACTIONS, taba=False)
+    write_file(filename, lines)
+    return len(lines)
+
+def timed(func, *args):
+    start = time.time()
+    result = func(*args)
+    return time.time() - start, result
+
+def read(filename):
+    with open(filename, 'rb') as file:
+        while file.read(SwiftReader._chunk_size):
+            pass
+
+def decode(reader, filename):
+    with open(filename, 'rb') as file:
+        for line in reader._read_lines(file):
+            pass
+
+def tokenize(reader, filename):
+    parser = reader._parser
+    with open(filename, 'rb') as file:
+        block = []
+        for line in reader._read_lines(file):
+            line = line.strip()
+            if line.startswith(parser._trailer):
+                for field in parser._tokenize(block):
+                    pass
+                block = []
+            elif line:
+                block.append(line)
+
+def parse(reader, filename):
+    return list(reader.iter_file(filename))
+
+def export(statements):
+    with open(os.devnull, 'w') as file:
+        NDJSONWriter(file).write_all(statements)
+
+def deep_size(root):
+    # bytes held by root and everything reachable from it, shared objects
+    # are counted once, classes are not followed
+    seen = set()
+    stack = [root]
+    size = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, type):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        else:
+            if hasattr(obj, '__dict__'):
+                stack.append(obj.__dict__)
+            for cls in type(obj).__mro__:
+                for name in cls.__dict__.get('__slots__', ()):
+                    # the slot descriptor, lazy __getattr__ must not decode
+                    try:
+                        stack.append(cls.__dict__[name].__get__(obj, cls))
+                    except AttributeError:
+                        pass
+    return size
+
+def run_case(parser, filename, lines):
+    # every phase includes the ones before it, the report shows the difference
+    timings = {}
+    timings['read'], _ = timed(read, filename)
+    timings['decode'], _ = timed(decode, SwiftReader(parser), filename)
+    timings['tokenize'], _ = timed(tokenize, SwiftReader(parser), filename)
+    total, statements = timed(parse, SwiftReader(parser), filename)
+    timings['parse'] = total
+    timings['json'], _ = timed(export, statements)
+
+    transactions = sum(len(s.transactions()) for s in statements)
+    memory = deep_size(statements)
+    return {
+        'parser': parser.__name__,
+        'statements': len(statements),
+        'transactions': transactions,
+        'lines': lines,
+        'bytes': os.path.getsize(filename),
+        'phases': {
+            'read': timings['read'],
+            'decode': max(timings['decode'] - timings['read'], 0),
+            'tokenize': max(timings['tokenize'] - timings['decode'], 0),
+            'fields': max(timings['parse'] - timings['tokenize'], 0),
+            'json': timings['json'],
+        },
+        'lines_per_sec': lines / total,
+        'transactions_per_sec': transactions / total,
+        'bytes_per_transaction': memory / float(transactions or 1),
+        # kilobytes on linux
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+def run_isolated(parser, filename, lines):
+    # peak RSS is per process, so every case gets a fresh one
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        os.write(write_fd, json.dumps(run_case(parser, filename, lines)).encode('utf-8'))
+        os._exit(0)
+
+    os.close(write_fd)
+    data = b''
+    while True:
+        chunk = os.read(read_fd, 65536)
+        if not chunk:
+            break
+        data += chunk
+    os.close(read_fd)
+    os.waitpid(pid, 0)
+    return json.loads(data.decode('utf-8'))
+
+def report(result):
+    phases = result['phases']
+    print "%-14s %6d stmts %8d txns %9d lines  %9.0f lines/s %8.0f txns/s  %7d KB peak" % (
+        result['parser'], result['statements'], result['transactions'], result['lines'],
+        result['lines_per_sec'], result['transactions_per_sec'], result['peak_rss_kb'])
+    print "%14s read %.3fs  decode %.3fs  tokenize %.3fs  fields %.3fs  json %.3fs  %6.0f bytes/txn" % (
+        '', phases['read'], phases['decode'], phases['tokenize'], phases['fields'], phases['json'],
+        result['bytes_per_transaction'])
+
+if __name__ == '__main__':
+    import argparse
+    arguments = argparse.ArgumentParser(description="Parser throughput benchmark on synthetic files")
+    arguments.add_argument('--json', help="write results to this file")
+    arguments.add_argument('--max-statements', type=int, default=None, help="skip larger sizes")
+    options = arguments.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='swift-bench-')
+    results = []
+    try:
+        for parser, kind, sizes in CASES:
+            for statements in sizes:
+                if options.max_statements and statements > options.max_statements:
+                    continue
+                filename = os.path.join(directory, '%s-%d' % (kind, statements))
+                lines = generate(kind, statements, filename)
+                result = run_isolated(parser, filename, lines)
+                results.append(result)
+                report(result)
+    finally:
+        shutil.rmtree(directory)
+
+    if options.json:
+        with open(options.json, 'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
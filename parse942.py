@@ -1,15 +1,15 @@
 #!/usr/bin/env python
 
-import json
-from swift import SwiftReader, MTJSONEncoder
+import sys
+from swift import SwiftReader, NDJSONWriter
 from swift.TabaSK import TabaParser942
 
 if __name__ == '__main__':
     import os, glob
     pattern = "download/*.VML"
 
+    writer = NDJSONWriter(sys.stdout)
     for filename in glob.glob(pattern):
-        print "Parsing %s ..." % filename
+        print >> sys.stderr, "Parsing %s ..." % filename
         parser = SwiftReader(TabaParser942)
-        statements = parser.parse_file(filename)
-        print json.dumps(statements, cls=MTJSONEncoder, sort_keys = True, indent = 2)
+        writer.write_all(parser.iter_file(filename))
@@ -2,9 +2,11 @@
 # -*- coding: utf-8 -*-
 
 import datetime, re
-from decimal import Decimal
 
 from . import JSONObject
+from .values import Money, shared, to_date, to_decimal
+
+FIELD_TAG_CHARS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
 
 class RunawayField(Exception):
     pass
@@ -35,14 +37,14 @@ class MTTransaction(JSONObject):
     def update(self, *args, **kwargs):
         for key, val in kwargs.items():
             if args and args[0]:
-                old_val = getattr(self, key, '')
-                setattr(self, key, str(old_val) + str(val))
+                old_val = getattr(self, key, None)
+                setattr(self, key, val if old_val is None else old_val + val)
             else:
                 setattr(self, key, val)
 
 class MTStatement(JSONObject):
 
-    __slots__ = ['transaction_ref', 'number', 'account', '_transactions']
+    __slots__ = ['transaction_ref', 'number', 'account', '_transactions', '_current_transaction']
     _transaction_class = MTTransaction
 
     def __init__(self, tref):
@@ -50,6 +52,7 @@ class MTStatement(JSONObject):
         self.number = None
         self.account = None
         self._transactions = []
+        self._current_transaction = None
 
     def update(self, **kwargs):
         for key, val in kwargs.items():
@@ -104,12 +107,34 @@ class MT942Statement(MTStatement):
         self.credit_minimum_amount = (None, None)
         self.debit_minimum_amount = (None, None)
 
+class QuarantinedStatement(JSONObject):
+
+    __slots__ = ['start_line', 'end_line', 'error', 'message', 'lines', '_exception']
+
+    def __init__(self, exception, lines, start_line, end_line):
+        self.start_line = start_line
+        self.end_line = end_line
+        self.error = type(exception).__name__
+        self.message = u"%s" % (exception,)
+        self.lines = list(lines)
+        self._exception = exception
+
+def shift_lines(obj, offset):
+    # moves the line range set by MTStatementParser._fail on an error or a
+    # quarantine record, for input parsed in blocks
+    if getattr(obj, 'start_line', None):
+        obj.start_line += offset
+        obj.end_line += offset
+
 class MTStatementParser(object):
 
     _header = '{1:'
     _trailer = '-}'
-    _encoding = None
+    # swift messages are plain ascii, latin-1 decodes any stray byte
+    _encoding = 'latin-1'
     _statement_class = MTStatement
+    # bump when parsed results change, invalidates cached results
+    _version = 5
 
     RE_HEADER = re.compile("^\{1\:F01([A-Z]{12})([0-9]{4})([0-9]{6})\}"
                       "\{2\:I([0-9]{3})([A-Z]{12})([A-Z])\}"
@@ -117,86 +142,185 @@ class MTStatementParser(object):
                       "\{4\:$"
                     )
 
-    RE_FIELD = re.compile("^\:([0-9A-Z]+)\:(.*)$")
-    RE_20 = re.compile("^(.{1:16})$")
-    RE_25 = re.compile("^(.{1:35})$")
+    RE_20 = re.compile("^(.{1,16})$")
+    RE_25 = re.compile("^(.{1,35})$")
     RE_28C = re.compile("^([0-9]{1,4})(\/([0-9]{1,5}))?$")
     RE_61 = re.compile("^([0-9]{2})([0-9]{2})([0-9]{2})([0-9]{2})([0-9]{2})"
                       "([CD])([0-9,]+)([A-Z]{4})([\w\/\. -]{0,16})"
                       "(\/\/([\w\/\. -]{0,16}))?$")
     
-    def __init__(self):
+    def __init__(self, table=None, stats=None, money=False, tolerant=False):
         self._name = 'MTStatementParser'
         self.current_statement = None   
         self.statements = []
+        # in tolerant mode failing statements are moved to quarantine
+        # instead of aborting the whole parse
+        self.tolerant = tolerant
+        self.quarantine = []
+        # optional columnar collector, see swift.columnar.TransactionTable
+        self.table = table
+        # optional swift.stats.ParserStats, handlers are only wrapped when set
+        self.stats = stats
+        # amounts as swift.values.Money instead of Decimal
+        self._amount = Money.parse if money else to_decimal
+        self._filter = None
+        self._field_parsers = dict((tag, getattr(self, name)) \
+            for tag, name in self._field_parser_names().items())
+        if stats is not None:
+            self._field_parsers = dict((tag, stats.wrap(tag, parser)) \
+                for tag, parser in self._field_parsers.items())
+
+    def parse(self, lines=[], statement_filter=None):
+        # every call starts over, results of earlier calls are not returned again
+        self.quarantine = []
+        self.statements = list(self.iter_statements(lines, statement_filter))
+        return self.statements
 
-    def parse(self, lines=[]):
-
+    def iter_statements(self, lines=[], statement_filter=None):
+        # yields every statement as soon as its trailer is seen, only the
+        # lines of the statement being parsed are kept in memory, statements
+        # rejected by statement_filter (swift.filters.StatementFilter) are
+        # dropped before their transactions are parsed
+        self._filter = statement_filter
+        self.current_statement = None
         statement_lines = []
+        start_line = lineno = 0
+        error = None
 
-        for line in lines:
+        for lineno, line in enumerate(lines, 1):
             line = line.strip()
             if not line:
                 continue
-            if self._encoding:
-                line = line.decode(self._encoding).encode('utf-8')
+            if isinstance(line, bytes):
+                line = line.decode(self._encoding)
+            if not start_line:
+                start_line = lineno
             if self._header and line.startswith(self._header):
-                self._parse_header(line)       
+                try:
+                    self._parse_header(line)       
+                except Exception as e:
+                    # reported together with the rest of its statement
+                    error = error or e
             elif line.startswith(self._trailer):
-                self._parse_statement(statement_lines)
-                self._statement_parsed()
+                statement = self._finish_statement(statement_lines, start_line, lineno, error)
                 statement_lines = []
+                start_line = 0
+                error = None
+                if statement is not None:
+                    if self.stats is not None:
+                        self.stats.statements += 1
+                        self.stats.transactions += len(statement.transactions())
+                    yield statement
             else:
                 statement_lines.append(line)
 
         if len(statement_lines):
-            raise UnfinishedStatement("Statement trailer `%s` not found." % self._trailer)
-
-        return self.statements
+            self._fail(UnfinishedStatement("Statement trailer `%s` not found." % self._trailer),
+                       statement_lines, start_line, lineno)
+
+    def _finish_statement(self, lines, start_line, end_line, error=None):
+        # table rows of statements that fail or are filtered out are dropped
+        rows = len(self.table) if self.table is not None else None
+        try:
+            if error is not None:
+                raise error
+            self._parse_statement(lines)
+            self._statement_parsed()
+        except Exception as e:
+            self.current_statement = None
+            if rows is not None:
+                self.table.truncate(rows)
+            self._fail(e, lines, start_line, end_line)
+            return None
+
+        statement = self.current_statement
+        self.current_statement = None
+        if rows is not None:
+            if statement is None:
+                self.table.truncate(rows)
+            else:
+                self.table.end_statement()
+        return statement
+
+    def _fail(self, error, lines, start_line, end_line):
+        # errors carry the line range of their statement, tolerant parsers
+        # keep them in quarantine and go on with the next statement
+        error.start_line = start_line
+        error.end_line = end_line
+        if not self.tolerant:
+            raise error
+        self.quarantine.append(QuarantinedStatement(error, lines, start_line, end_line))
 
     def _parse_statement(self, lines=[]):
+        field_parsers = self._field_parsers
+        statement_filter = self._filter
+        filtered = statement_filter is None
+
+        for tag, value, subfields in self._tokenize(lines):
+            if not filtered and tag == '61':
+                filtered = True
+                if not statement_filter.accepts(self.current_statement, value):
+                    self.current_statement = None
+                    return
+            try:
+                field_parser = field_parsers[tag]
+            except KeyError:
+                if self.stats is not None:
+                    self.stats.field(tag).errors += 1
+                raise MissingFieldParser("Field parser %s not implemented" % tag)
+            if not (tag == '20' or self.current_statement):
+                raise RunawayField("Runaway field %s `%s`" % (tag, value))
 
-        field = (None, None, [])
+            field_parser(value, subfields)
 
-        for line in lines:
-            match = self.RE_FIELD.match(line)
-            if match:
-                if field[0]:
-                    try: 
-                        field_parser = getattr(self, '_field_%s' % field[0].lower())
-                    except AttributeError:
-                        raise MissingFieldParser("Field parser %s not implemented" % field[0])
-                    else:
-                        if not (field[0] == '20' or self.current_statement):
-                            raise RunawayField("Runaway field %c `%s`" % (field[0], value))
-
-                        field_parser(field[1], field[2])
-
-                field = (match.group(1), match.group(2), [])
-            else:
-                field[2].append(line)
+        if not filtered and self.current_statement is not None \
+                and not statement_filter.accepts(self.current_statement):
+            self.current_statement = None
 
-        if field[0]:
-            try: 
-                field_parser = getattr(self, '_field_%s' % field[0].lower())
-            except AttributeError:
-                raise NotImplementedError("Field parser %s not implemented" % field[0])
-            else:
-                field_parser(field[1], field[2])
+    def _tokenize(self, lines=[]):
+        # single pass split into (tag, value, continuation lines), a line
+        # opens a new field when it looks like `:TAG:value`
+        tag = None
+
+        for line in lines:
+            if line[:1] == ':':
+                end = line.find(':', 1)
+                if end > 1 and not line[1:end].strip(FIELD_TAG_CHARS):
+                    if tag is not None:
+                        yield tag, value, subfields
+                    tag, value, subfields = line[1:end], line[end + 1:], []
+                    continue
+            if tag is not None:
+                subfields.append(line)
+
+        if tag is not None:
+            yield tag, value, subfields
+
+    @classmethod
+    def _field_parser_names(cls):
+        # tag -> handler name, collected once per parser class
+        names = cls.__dict__.get('_field_parser_cache')
+        if names is None:
+            names = dict((name[7:].upper(), name) for name in dir(cls)
+                         if name.startswith('_field_') and '_' not in name[7:])
+            cls._field_parser_cache = names
+        return names
 
-            
     def _parse_header(self, line):
         if not self.RE_HEADER.match(line):
-            raise InvalidSwiftHeader("Invalid swift header `%s`" % line)
+            raise InvalidSwift("Invalid swift header `%s`" % line)
 
     def _statement_parsed(self):
         pass
 
     def _field_20(self, value, subfields=[]):
+        # a second field 20 in one block means a trailer is missing, the open
+        # statement would be lost otherwise
+        if self.current_statement is not None:
+            raise UnfinishedStatement("Statement trailer `%s` not found before field 20 `%s`" % (self._trailer, value))
         m = self.RE_20.match(value)
         if m:
             self.current_statement = self._statement_class(m.group(1))
-            self.statements.append(self.current_statement)
         else:
             raise InvalidFieldValue("Invalid field 20 value `%s`" % value)
         return m
@@ -205,7 +329,7 @@ class MTStatementParser(object):
     def _field_25(self, value, subfields=[]):
         m = self.RE_25.match(value)
         if m:
-            self.current_statement.account = m.group(1)
+            self.current_statement.account = shared(m.group(1))
         else:
             raise InvalidFieldValue("Invalid field 25 value `%s`" % value)
         return m
@@ -223,15 +347,18 @@ class MTStatementParser(object):
     def _field_61(self, value, subfields=[]):
         m = self.RE_61.match(value)
         if m:
-            value_date = datetime.date(2000 + int(m.group(1)), int(m.group(2)), int(m.group(3)))
-            entry_date = datetime.date(value_date.year, int(m.group(4)), int(m.group(5)))
-            amount = Decimal(m.group(7).replace(',','.'))
+            value_date = to_date(value[:6])
+            entry_date = to_date(value[:2] + value[6:10])
+            amount = self._amount(m.group(7))
             sign = '-' if m.group(6) == 'D' else '+'
-            type_code = m.group(8)
-            cust_ref = m.group(9)
+            type_code = shared(m.group(8))
+            cust_ref = shared(m.group(9))
             bank_ref = m.group(10)
             self.current_statement.add_transaction(value_date = value_date, entry_date = entry_date, 
                     amount = amount, sign = sign, type_code = type_code, cust_ref = cust_ref, bank_ref = bank_ref)
+            if self.table is not None:
+                self.table.append(self.current_statement.account, value_date, entry_date, 
+                        m.group(7), sign, type_code, cust_ref, bank_ref)
         else:
             raise InvalidFieldValue("Invalid field 61 value `%s`" % value)
         return m
@@ -247,21 +374,30 @@ class MT940Parser(MTStatementParser):
     # matches 60F, 60M, 62F, 62M, 64, 65
     RE_6XX = re.compile("^([CD])([0-9]{2})([0-9]{2})([0-9]{2})([A-Z]{3})([0-9,]+)$")
 
+    # field text and tuple of the last closing balance, it usually reopens
+    # the next statement
+    _balance = (None, None)
 
     def _field_6xx_balance(self, value, field):
         m = self.RE_6XX.match(value)
         if m:
-            value_date = datetime.date(2000 + int(m.group(2)), int(m.group(3)), int(m.group(4)))
-            currency = m.group(5)
-            amount = Decimal(m.group(6).replace(',', '.'))
-            if m.group(1) == 'D':
-                amount = -amount
+            # keyed on the text, Decimal('100') equals Decimal('100.00')
+            if self._balance[0] == value:
+                balance = self._balance[1]
+            else:
+                value_date = to_date(value[1:7])
+                currency = shared(m.group(5))
+                amount = self._amount(m.group(6))
+                if m.group(1) == 'D':
+                    amount = -amount
+                balance = (amount, currency, value_date)
             if field.startswith('60'):
-                self.current_statement.opening_balance= (amount, currency, value_date)
+                self.current_statement.opening_balance = balance
             elif field.startswith('62'):
-                self.current_statement.closing_balance = (amount, currency, value_date)
+                self.current_statement.closing_balance = balance
+                self._balance = (value, balance)
             elif field.startswith('64'):
-                self.current_statement.closing_available_balance = (amount, currency, value_date)
+                self.current_statement.closing_available_balance = balance
             else:
                 raise InvalidFieldValue("Invalid field %s value `%s`" % (field, value))
         else:
@@ -284,7 +420,7 @@ class MT940Parser(MTStatementParser):
 
 class MT942Parser(MTStatementParser):
 
-    _statment_class = MT942Statement
+    _statement_class = MT942Statement
 
     RE_13D = re.compile("^([0-9]{10})([+-])([0-9]{4})$")
     RE_34F = re.compile("^([A-Z]{3})([CD])?([0-9,]+)$")
@@ -306,7 +442,7 @@ class MT942Parser(MTStatementParser):
     def _field_90c(self, value, subfields=[]):
         m = self.RE_90X.match(value)
         if m:
-            self.credit_transactions = (m.group(1), m.group(2), m.group(2))
+            self.current_statement.credit_transactions = (m.group(1), m.group(2), m.group(3))
         else:
             raise InvalidFieldValue("Invalid field 90C value `%s`" % value)
         return m
@@ -314,7 +450,7 @@ class MT942Parser(MTStatementParser):
     def _field_90d(self, value, subfields=[]):
         m = self.RE_90X.match(value)
         if m:
-            self.debit_transactions = (m.group(1), m.group(2), m.group(2))
+            self.current_statement.debit_transactions = (m.group(1), m.group(2), m.group(3))
         else:
             raise InvalidFieldValue("Invalid field 90D value `%s`" % value)
         return m
@@ -2,26 +2,77 @@
 # -*- coding: utf-8 -*-
 
 import datetime, re
-import MT940
+from . import MT940
+from .subfields import Subfield, SubfieldSpec
+from .values import shared
 
 class MT940TransactionSK(MT940.MTTransaction):
     __slots__ = ['type', 'vs', 'ks', 'ss', 'message', 'other_account', 
-                 'other_name', 'message', 'pos_number', 'other_ref']
+                 'other_name', 'pos_number', 'other_ref', '_raw_86']
+
+    # attributes decoded from field 86 subfields
+    _lazy_attrs = frozenset(['vs', 'ks', 'ss', 'message', 'other_account', 
+                             'other_name', 'pos_number', 'other_ref'])
 
     def __init__(self):
         super(MT940.MTTransaction, self).__init__()
         self.type = ()
+        self._raw_86 = None
+
+    def __getattr__(self, name):
+        # only reached for unset slots, decodes deferred field 86 on first access
+        if name in self._lazy_attrs:
+            raw = self._raw_86
+            if raw is not None:
+                self._raw_86 = None
+                raw[0]._decode_86(self, raw[1])
+                return getattr(self, name)
+        raise AttributeError(name)
 
 class MT940StatementSK(MT940.MT940Statement):
+    __slots__ = ()
     _transaction_class = MT940TransactionSK
 
 # todo
 class MT942StatementSK(MT940.MT942Statement):
+    __slots__ = ()
     _transaction_class = MT940TransactionSK
     _json_ignore = ("credit_minimum_amount", "credit_transactions", 
                     "debit_minimum_amount", "debit_transactions", "number") 
 
-class TabaParser940(MT940.MT940Parser):
+class TabaField86Mixin(object):
+
+    # field 86 of both Taba formats, classes set SUBFIELDS_86
+    RE_86_00 = re.compile("^([0-9]{3})\?00([0-9A-Za-z_ -]+)$")
+    RE_SYMBOL = re.compile('[VSK]S[0-9]{0,10}')
+
+    def _field_86(self, value, subfields=[]):
+        statement = self.current_statement
+        m = self.RE_86_00.match(value)
+        if m:
+            transaction_type = shared(m.groups())
+            statement.update_transaction(type = transaction_type)
+            if self.table is not None:
+                self.table.set_type(transaction_type)
+        else:
+            raise MT940.InvalidFieldValue("Invalid field 86:00 value `%s`" % value)
+
+        if self._lazy:
+            statement.update_transaction(_raw_86 = (type(self), subfields))
+        else:
+            self._decode_86(statement.current_transaction(), subfields)
+
+    @classmethod
+    def _decode_86(cls, transaction, subfields):
+        cls.SUBFIELDS_86.decode(transaction, subfields)
+
+        # try to get VS,SS,KS from end-to-end reference
+        ref = getattr(transaction,'other_ref',None)
+        if ref:
+            for val in cls.RE_SYMBOL.findall(ref):
+                transaction.update(**{val[:2].lower() : val[2:]})
+
+class TabaParser940(TabaField86Mixin, MT940.MT940Parser):
 
     _statement_class = MT940StatementSK
     _header = None
@@ -30,70 +81,41 @@ class TabaParser940(MT940.MT940Parser):
 
     RE_20 = re.compile("^MC940([0-9]{6})00000$")
     RE_25 = re.compile("^SK([0-9]{2})([0-9]{4})([0-9]{6})([0-9]{10})$")
-    RE_86_00 = re.compile("^([0-9]{3})\?00([0-9A-Za-z_ -]+)$")
-    RE_EMPTY_SUBFIELD = re.compile('^\?\d\d$')
-    RE_SYMBOL = re.compile('[VSK]S[0-9]{0,10}')
 
-    def __init__(self):
-        super(TabaParser940, self).__init__()
+    SUBFIELDS_86 = SubfieldSpec([
+        Subfield('20', 'vs', prefix='VS'),
+        Subfield('21', 'ss', prefix='SS', shared=True),
+        Subfield('22', 'ks', prefix='KS', shared=True),
+        Subfield('23', 'pos_number', prefix='POS'),
+        Subfield('24', 'message'),
+        Subfield('25', 'message', append=True),
+        Subfield('26', 'message', append=True),
+        Subfield('27', 'message', append=True),
+        Subfield('28', 'message', append=True),
+        Subfield('29', 'message', append=True),
+        Subfield('31', 'other_name', when={'cust_ref': ('DEPOSIT', 'FEES', 'WITHDRAWAL')}),
+        Subfield('31', None, when={'cust_ref': ('COLLECTION', 'INTER.CAPITALIS.')}),
+        Subfield('31', 'other_account', shared=True),
+        Subfield('32', 'other_name'),
+        Subfield('33', 'other_name', append=True, separator=' '),
+        Subfield('38', 'other_account', shared=True, unless={'cust_ref': ('COLLECTION', 'INTER.CAPITALIS.', 
+                                                             'DEPOSIT', 'FEES', 'WITHDRAWAL')}),
+        Subfield('60', 'other_ref'),
+    ])
+
+    def __init__(self, lazy=False, **kwargs):
+        super(TabaParser940, self).__init__(**kwargs)
         self._name = 'TaBaSK MT942 Parser'
+        # defer field 86 subfields until first accessed
+        self._lazy = lazy
 
     def _field_25(self, value, subfields=[]):
         m = super(TabaParser940, self)._field_25(value, subfields)
-        self.current_statement.update(account = "%s-%s/%s" % (m.group(3), m.group(4), m.group(2)))
-
-    def _field_86(self, value, subfields=[]):
-        statement = self.current_statement
-        type_code = getattr(statement.current_transaction(), 'type_code', None)
-        cust_ref = getattr(statement.current_transaction(), 'cust_ref', None)
-        m = self.RE_86_00.match(value)
-        if m:
-            statement.update_transaction(type = (m.group(1), m.group(2)))
-        else:
-            raise MT940.InvalidFieldValue("Invalid field 86:00 value `%s`" % value)              
-
-        for line in subfields:
-            if self.RE_EMPTY_SUBFIELD.match(line):
-                continue
-            elif line.startswith('?20VS'):
-                statement.update_transaction(vs=line[5:])
-            elif line.startswith('?21SS'):
-                statement.update_transaction(ss=line[5:])
-            elif line.startswith('?22KS'):
-                statement.update_transaction(ks=line[5:])
-            elif line.startswith('?23POS'):
-                statement.update_transaction(pos_number=line[6:])                
-            elif line.startswith('?24'):
-                statement.update_transaction(message = line[3:])
-            elif line.startswith('?25') or line.startswith('?26') or line.startswith('?27') \
-                                        or line.startswith('?28') or line.startswith('?29'):
-                if line[3:]:
-                    statement.update_transaction(True, message = line[3:])
-            elif line.startswith('?31'):
-                if cust_ref in ('DEPOSIT', 'FEES', 'WITHDRAWAL'):
-                    statement.update_transaction(other_name =  line[3:])
-                elif cust_ref in ('COLLECTION', 'INTER.CAPITALIS.'):
-                    pass
-                else:
-                    statement.update_transaction(other_account = line[3:])
-            elif line.startswith('?32'):
-                statement.update_transaction(other_name=line[3:])
-            elif line.startswith('?33'):
-                statement.update_transaction(True, other_name=" " +line[3:])
-            elif line.startswith('?38') and cust_ref not in ('COLLECTION', 'INTER.CAPITALIS.', 'DEPOSIT', 'FEES', 'WITHDRAWAL'):
-                statement.update(other_account = line[3:])
-            elif line.startswith('?60'):
-                statement.update_transaction(other_ref = line[3:])
-
-        # try to get VS,SS,KS from end-to-end reference
-        ref = getattr(statement.current_transaction(),'other_ref',None)
-        if ref:
-            for val in self.RE_SYMBOL.findall(ref):
-                statement.update_transaction(**{val[:2].lower() : val[2:]})
+        self.current_statement.update(account = shared("%s-%s/%s" % (m.group(3), m.group(4), m.group(2))))
 
 
 
-class TabaParser942(MT940.MT942Parser):
+class TabaParser942(TabaField86Mixin, MT940.MT942Parser):
 
     _statement_class = MT942StatementSK
 
@@ -102,13 +124,26 @@ class TabaParser942(MT940.MT942Parser):
     RE_13 = re.compile("^([0-9]{10})$")
     RE_20 = re.compile("^([0-9]{4})-([0-9]{2})-([0-9]{2})-([0-9]{2})\.([0-9]{2})$")
     RE_25 = re.compile("^([0-9]{4})\/([0-9]{10})$")
-    RE_86_00 = re.compile("^([0-9]{3})\?00([0-9A-Za-z_ -]+)$")
-    RE_EMPTY_SUBFIELD = re.compile('^\?\d\d$')
-    RE_SYMBOL = re.compile('[VSK]S[0-9]{0,10}')
 
-    def __init__(self):
-        super(TabaParser942, self).__init__()
+    SUBFIELDS_86 = SubfieldSpec([
+        Subfield('24', 'other_ref'),
+        Subfield('25', 'message', append=True),
+        Subfield('31', 'other_account', shared=True, when={'sign': ('+',)}),
+        Subfield('32', 'other_name'),
+        Subfield('33', 'other_name', append=True),
+        Subfield('60', 'message'),
+        Subfield('61', 'message', append=True),
+        Subfield('62', 'message', append=True),
+        Subfield('63', 'message', append=True),
+        Subfield('64', 'message', append=True),
+        Subfield('65', 'message', append=True),
+    ])
+
+    def __init__(self, lazy=False, **kwargs):
+        super(TabaParser942, self).__init__(**kwargs)
         self._name = 'TaBa SK MT942 Parser'
+        # defer field 86 subfields until first accessed
+        self._lazy = lazy
 
     def _field_13(self, value, subfields=[]):
         m = self.RE_13.match(value)
@@ -126,46 +161,7 @@ class TabaParser942(MT940.MT942Parser):
 
     def _field_25(self, value, subfields=[]):
         m = super(TabaParser942, self)._field_25(value, subfields)
-        self.current_statement.update(account = "000000-%s/%s" % (m.group(2), m.group(1)))
-
-    # todo
-    def _field_86(self, value, subfields=[]):
-        statement = self.current_statement
-        sign = getattr(statement.current_transaction(), 'sign')
-
-        #type_code = getattr(statement.current_transaction(), 'type_code', None)
-        #cust_ref = getattr(statement.current_transaction(), 'cust_ref', None)
-        m = self.RE_86_00.match(value)
-        if m:
-            statement.update_transaction(type = (m.group(1), m.group(2)))
-        else:
-            raise MT940.InvalidFieldValue("Invalid field 86:00 value `%s`" % value)
-
-        for line in subfields:
-            if self.RE_EMPTY_SUBFIELD.match(line):
-                continue
-            elif line.startswith('?24'):
-                statement.update_transaction(other_ref = line[3:])
-            elif line.startswith('?25'):
-                    statement.update_transaction(True, message = line[3:])
-            elif line.startswith('?31') and sign == '+':
-                statement.update_transaction(other_account = line[3:])
-            elif line.startswith('?32'):
-                statement.update_transaction(other_name=line[3:])
-            elif line.startswith('?33'):
-                statement.update_transaction(True, other_name=line[3:])
-            elif line.startswith('?60'):
-                statement.update_transaction(message = line[3:])
-            elif line.startswith('?61') or line.startswith('?62') or line.startswith('?63') \
-                                        or line.startswith('?64') or line.startswith('?65'):
-                if line[3:]:
-                    statement.update_transaction(True, message = line[3:])
-        
-        # try to get VS,SS,KS from end-to-end reference
-        ref = getattr(statement.current_transaction(),'other_ref',None)
-        if ref:
-            for val in self.RE_SYMBOL.findall(ref):
-                statement.update_transaction(**{val[:2].lower() : val[2:]})
+        self.current_statement.update(account = shared("000000-%s/%s" % (m.group(2), m.group(1))))
 
     def _field_90c(self, value, subfields=[]):
         pass
@@ -1,44 +1,191 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import codecs
 from decimal import Decimal
-from datetime import date
+from datetime import date, datetime
 from json import JSONEncoder
 from itertools import chain
 
+from .values import Money
+
 class JSONObject(object):
 
+    # subclasses declare their attributes in __slots__, none has a __dict__
+    __slots__ = ()
     _json_ignore = ()
 
-    def _attrs(self):
-        return list(set(chain(*[getattr(cls, '__slots__', []) for cls in type(self).__mro__])))
+    @classmethod
+    def _attrs(cls):
+        # slots over the whole mro, collected once per class
+        attrs = cls.__dict__.get('_attrs_cache')
+        if attrs is None:
+            attrs = cls._attrs_cache = list(set(chain(*[getattr(c, '__slots__', []) for c in cls.__mro__])))
+        return attrs
+
+    @classmethod
+    def _json_fields(cls):
+        fields = cls.__dict__.get('_json_fields_cache')
+        if fields is None:
+            fields = cls._json_fields_cache = tuple(sorted(k for k in cls._attrs() \
+                if not (k.startswith('_') or k in cls._json_ignore)))
+        return fields
 
     def to_json(self):
-        return dict((k, getattr(self,k,'')) \
-            for k in self._attrs() if not (k.startswith('_') or k in self._json_ignore))
+        return dict((k, getattr(self,k,'')) for k in self._json_fields())
 
 
+def _json_date(obj):
+    return obj.strftime('%Y-%m-%d')
+
 class MTJSONEncoder(JSONEncoder):
 
+    # type -> serializer, JSONObject classes and subclasses of the known
+    # types are added on first sight, later instances are one dict lookup
+    _converters = {Decimal: float, Money: float, date: _json_date, datetime: _json_date}
+
     def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, date):
-            return obj.strftime('%Y-%m-%d')
-        if isinstance(obj, JSONObject):
-            return obj.to_json()
+        converter = self._converters.get(type(obj)) or self._converter(type(obj))
+        if converter:
+            return converter(obj)
 
         return JSONEncoder.default(self, obj)
 
+    @classmethod
+    def _converter(cls, type_):
+        if issubclass(type_, JSONObject):
+            converter = type_.to_json
+        elif issubclass(type_, Decimal):
+            converter = float
+        elif issubclass(type_, date):
+            converter = _json_date
+        else:
+            return None
+        cls._converters[type_] = converter
+        return converter
+
+
+class NDJSONWriter(object):
+
+    # one statement per line, or one transaction per line with the keys
+    # of its statement when transactions is set
+    _statement_keys = ('transaction_ref', 'account', 'number')
+
+    def __init__(self, file, transactions=False):
+        self._file = file
+        self._transactions = transactions
+        self._encode = MTJSONEncoder(sort_keys=True, separators=(',', ':')).encode
+        self.count = 0
+
+    def write(self, statement):
+        if not self._transactions:
+            self._write(statement.to_json())
+            return
+
+        keys = dict((k, getattr(statement, k, '')) for k in self._statement_keys)
+        for transaction in statement.transactions():
+            json = transaction.to_json()
+            json.update(keys)
+            self._write(json)
+
+    def write_all(self, statements):
+        for statement in statements:
+            self.write(statement)
+        return self.count
+
+    def _write(self, json):
+        self._file.write(self._encode(json))
+        self._file.write('\n')
+        self.count += 1
+
+
 class SwiftReader(object):
 
-    def __init__(self, parser):
+    _chunk_size = 1 << 20
+
+    def __init__(self, parser, **options):
         self._parser_class = parser
-        self._parser = self._parser_class()
+        self._parser_options = options
+        self._parser = self._parser_class(**options)
+
+    def _new_parser(self):
+        # every parse gets a fresh parser, so state never leaks between
+        # files, stats and table given in options are shared by all of them
+        self._parser = self._parser_class(**self._parser_options)
+        return self._parser
+
+    def parse_file(self, filename, workers=1, **filters):
+        # more than one worker parses shards of the file in a process pool,
+        # None uses all cores
+        if workers != 1:
+            from .parallel import parse_file
+            result = parse_file(self._parser_class, filename, workers,
+                self._statement_filter(filters), **self._parser_options)
+            if result is not None:
+                statements, quarantine = result
+                self._new_parser().quarantine.extend(quarantine)
+                return statements
+
+        with open(filename, 'rb') as file:
+            return self.parse(self._read_lines(file), **filters)
+
+    def parse(self, lines, **filters):
+        # filters: account, number, date_from, date_to, see swift.filters
+        return self._new_parser().parse(lines, self._statement_filter(filters))
+
+    def iter_file(self, filename, **filters):
+        with open(filename, 'rb') as file:
+            for statement in self.iter_statements(self._read_lines(file), **filters):
+                yield statement
+
+    def iter_statements(self, lines, **filters):
+        return self._new_parser().iter_statements(lines, self._statement_filter(filters))
+
+    def stats(self):
+        return self._parser.stats
+
+    def quarantine(self):
+        # statements rejected by a tolerant parser, see MT940.QuarantinedStatement
+        return self._parser.quarantine
+
+    def write_quarantine(self, file):
+        return NDJSONWriter(file).write_all(self._parser.quarantine)
+
+    def map_file(self, filename):
+        from .mapped import MappedReader
+        return MappedReader(self._parser_class, filename, **self._parser_options)
+
+    def index_file(self, filename):
+        from .index import StatementIndex
+        return StatementIndex.open(self._parser_class, filename)
+
+    def tail_file(self, filename, checkpoint=None):
+        from .tail import IncrementalReader
+        return IncrementalReader(self._parser_class, filename, checkpoint, **self._parser_options)
+
+    def _statement_filter(self, filters):
+        if not filters:
+            return None
+        from .filters import StatementFilter
+        return StatementFilter(**filters)
+
+    def _read_lines(self, file):
+        return self._decode_lines(file, self._parser._encoding)
+
+    def _decode_lines(self, file, encoding):
+        # decodes the file in large chunks, the incremental decoder carries
+        # multibyte sequences split across chunk boundaries
+        decoder = codecs.getincrementaldecoder(encoding)()
+        pending = u''
 
-    def parse_file(self, filename):
-        with open(filename) as file:
-            return self.parse(file.read().splitlines())
+        while True:
+            chunk = file.read(self._chunk_size)
+            lines = (pending + decoder.decode(chunk, not chunk)).split(u'\n')
+            pending = lines.pop()
+            for line in lines:
+                yield line
+            if not chunk:
+                break
 
-    def parse(self, lines):
-        return self._parser.parse(lines)
+        if pending:
+            yield pending
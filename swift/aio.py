@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# asyncio interface, requires python 3.6+
+
+import codecs
+
+from .MT940 import shift_lines
+
+async def _chunks(source, chunk_size):
+    if hasattr(source, 'read'):
+        while True:
+            chunk = await source.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        async for chunk in source:
+            yield chunk
+
+def _parse(parser, lines, offset):
+    # every block is parsed on its own, line numbers of errors and
+    # quarantine records are shifted to count from the start of the stream
+    quarantined = len(parser.quarantine)
+    try:
+        for statement in parser.iter_statements(lines):
+            yield statement
+    except Exception as e:
+        shift_lines(e, offset)
+        raise
+    for record in parser.quarantine[quarantined:]:
+        shift_lines(record, offset)
+
+async def iter_statements(parser, source, chunk_size=1 << 16, **options):
+    # source is an asyncio.StreamReader or any async iterable of bytes,
+    # statements are yielded as soon as their trailer arrives; parser is a
+    # parser class built with options, or an instance so the caller can
+    # read its quarantine and stats
+    if isinstance(parser, type):
+        parser = parser(**options)
+    decoder = codecs.getincrementaldecoder(parser._encoding)()
+    trailer = parser._trailer
+    pending = ''
+    statement_lines = []
+    offset = 0
+
+    async for chunk in _chunks(source, chunk_size):
+        lines = (pending + decoder.decode(chunk)).split('\n')
+        pending = lines.pop()
+        for line in lines:
+            statement_lines.append(line)
+            if line.strip().startswith(trailer):
+                for statement in _parse(parser, statement_lines, offset):
+                    yield statement
+                offset += len(statement_lines)
+                statement_lines = []
+
+    statement_lines.append(pending + decoder.decode(b'', True))
+    for statement in _parse(parser, statement_lines, offset):
+        yield statement
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import glob, multiprocessing, os
+from collections import namedtuple
+
+try:
+    from cStringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from . import SwiftReader, NDJSONWriter
+from .MT940 import MT940Parser
+from .TabaSK import TabaParser940, TabaParser942
+from .stats import clock
+
+# parsers by file extension of the bank downloads
+EXTENSIONS = {'.sta': TabaParser940, '.vml': TabaParser942, '.940': MT940Parser}
+
+FileResult = namedtuple('FileResult', 'filename parser size statements transactions quarantined seconds error')
+
+def find_files(patterns):
+    # patterns are globs or directories, directories are searched for
+    # files with a known extension, every file is listed once
+    files, seen = [], set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            names = [os.path.join(pattern, name) for name in os.listdir(pattern)
+                     if os.path.splitext(name)[1].lower() in EXTENSIONS]
+        else:
+            names = glob.glob(pattern)
+        for name in sorted(names):
+            if name not in seen:
+                seen.add(name)
+                files.append(name)
+    return files
+
+def parser_for(filename):
+    try:
+        return EXTENSIONS[os.path.splitext(filename)[1].lower()]
+    except KeyError:
+        raise ValueError("No parser for `%s`, pass one explicitly." % filename)
+
+def output_filename(directory, filename):
+    return os.path.join(directory, os.path.basename(filename) + '.ndjson')
+
+def ingest(filenames, out=None, parser=None, workers=None, output_dir=None, transactions=False, **options):
+    # parses every file in a worker pool and yields a FileResult per file in
+    # the order given; output goes to one file per input in output_dir or is
+    # combined into out, a failing file does not stop the others
+    tasks = [(filename, parser, output_dir, transactions, options) for filename in filenames]
+    workers = workers or multiprocessing.cpu_count()
+
+    if workers == 1 or len(tasks) < 2:
+        results = (_ingest_file(task) for task in tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(min(workers, len(tasks)))
+        results = pool.imap(_ingest_file, tasks)
+
+    try:
+        for result, text in results:
+            if text and out is not None:
+                out.write(text)
+            yield result
+        if pool is not None:
+            pool.close()
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+def _ingest_file(task):
+    filename, parser, output_dir, transactions, options = task
+    start = clock()
+    statements = count = quarantined = size = 0
+    text = error = None
+    try:
+        parser = parser or parser_for(filename)
+        size = os.path.getsize(filename)
+        # output of failed files is dropped from the combined output
+        buffer = StringIO() if output_dir is None else open(output_filename(output_dir, filename), 'w')
+        try:
+            writer = NDJSONWriter(buffer, transactions)
+            reader = SwiftReader(parser, **options)
+            for statement in reader.iter_file(filename):
+                writer.write(statement)
+                statements += 1
+                count += len(statement.transactions())
+            quarantined = len(reader.quarantine())
+            if output_dir is None:
+                text = buffer.getvalue()
+        finally:
+            buffer.close()
+    except Exception as e:
+        error = u'%s: %s' % (type(e).__name__, e)
+
+    name = parser.__name__ if parser else None
+    return FileResult(filename, name, size, statements, count, quarantined, clock() - start, error), text
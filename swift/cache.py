@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import hashlib, json, os, zlib
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from . import SwiftReader
+
+class ParseCache(object):
+
+    _suffix = '.mtc'
+    _stat_file = 'stat.json'
+    _block_size = 1 << 20
+
+    def __init__(self, directory, max_size=256 << 20):
+        self.directory = directory
+        self.max_size = max_size
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._stats = self._load_stats()
+
+    def parse_file(self, parser, filename):
+        key = self._key(parser, filename)
+        statements = self._get(key)
+        if statements is None:
+            statements = SwiftReader(parser).parse_file(filename)
+            self._put(key, statements)
+        return statements
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(self._suffix) or name == self._stat_file:
+                os.remove(os.path.join(self.directory, name))
+        self._stats = {}
+
+    def _key(self, parser, filename):
+        return hashlib.sha1(('%s:%s.%s:%s' % (self._digest(filename),
+            parser.__module__, parser.__name__, parser._version)).encode('ascii')).hexdigest()
+
+    def _digest(self, filename):
+        # content hash, reused while size and mtime are unchanged
+        path = os.path.abspath(filename)
+        stat = os.stat(path)
+        cached = self._stats.get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime:
+            return cached[2]
+
+        digest = hashlib.sha1()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(self._block_size), b''):
+                digest.update(block)
+        self._stats[path] = [stat.st_size, stat.st_mtime, digest.hexdigest()]
+        self._save_stats()
+        return self._stats[path][2]
+
+    def _get(self, key):
+        path = os.path.join(self.directory, key + self._suffix)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+        except IOError:
+            return None
+        try:
+            statements = pickle.loads(zlib.decompress(data))
+        except Exception:
+            # truncated, corrupt or written for other classes, parsed again
+            self._remove(path)
+            return None
+        # mtime marks the entry as recently used
+        os.utime(path, None)
+        return statements
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _put(self, key, statements):
+        path = os.path.join(self.directory, key + self._suffix)
+        with open(path + '.tmp', 'wb') as file:
+            file.write(zlib.compress(pickle.dumps(statements, pickle.HIGHEST_PROTOCOL)))
+        os.rename(path + '.tmp', path)
+        self._evict()
+
+    def _evict(self):
+        # drops least recently used entries until the cache fits max_size
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(self._suffix):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        size = sum(e[1] for e in entries)
+        for mtime, entry_size, name in sorted(entries):
+            if size <= self.max_size:
+                break
+            os.remove(os.path.join(self.directory, name))
+            size -= entry_size
+
+    def _load_stats(self):
+        try:
+            with open(os.path.join(self.directory, self._stat_file)) as file:
+                return json.load(file)
+        except (IOError, ValueError):
+            return {}
+
+    def _save_stats(self):
+        path = os.path.join(self.directory, self._stat_file)
+        with open(path + '.tmp', 'w') as file:
+            json.dump(self._stats, file)
+        os.rename(path + '.tmp', path)
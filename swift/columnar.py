@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from array import array
+
+from .values import to_minor_units
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    array('q')
+    INT64 = 'q'
+except ValueError:
+    # python 2 has no 'q', 'l' is 64 bit on LP64 platforms
+    INT64 = 'l'
+
+class Categories(object):
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def code(self, value):
+        try:
+            return self._codes[value]
+        except KeyError:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+            return code
+
+
+class TransactionTable(object):
+
+    _columns = ['statement', 'account', 'value_date', 'entry_date', 'amount', 'sign',
+                'type_code', 'cust_ref', 'bank_ref', 'type']
+    _categories = ['account', 'type_code', 'cust_ref', 'bank_ref', 'type']
+
+    def __init__(self, scale=2):
+        self.scale = scale
+        # row id of the statement every transaction belongs to, ids count the
+        # statements finished by the parser in the order they are returned
+        self.statements = 0
+        self.statement = array('i')
+        self.account = array('i')
+        self.value_date = array('i')
+        self.entry_date = array('i')
+        self.amount = array(INT64)
+        self.sign = array('b')
+        self.type_code = array('i')
+        self.cust_ref = array('i')
+        self.bank_ref = array('i')
+        self.type = array('i')
+        self.categories = dict((name, Categories()) for name in self._categories)
+        self._codes = dict((name, self.categories[name].code) for name in self._categories)
+
+    def __len__(self):
+        return len(self.amount)
+
+    def __getstate__(self):
+        # bound methods in _codes do not pickle on python 2
+        state = dict(self.__dict__)
+        del state['_codes']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._codes = dict((name, self.categories[name].code) for name in self._categories)
+
+    def append(self, account, value_date, entry_date, amount, sign, type_code, cust_ref, bank_ref):
+        # amount is the raw field text, e.g. `123,45`
+        codes = self._codes
+        self.statement.append(self.statements)
+        self.account.append(codes['account'](account))
+        self.value_date.append(value_date.toordinal())
+        self.entry_date.append(entry_date.toordinal())
+        self.amount.append(to_minor_units(amount, self.scale))
+        self.sign.append(-1 if sign == '-' else 1)
+        self.type_code.append(codes['type_code'](type_code))
+        self.cust_ref.append(codes['cust_ref'](cust_ref))
+        self.bank_ref.append(codes['bank_ref'](bank_ref))
+        self.type.append(-1)
+
+    def end_statement(self):
+        # called by the parser for every statement it returns
+        self.statements += 1
+
+    def extend(self, table):
+        # appends the rows of another table, its categories are recoded and
+        # its statements follow the ones of this table
+        for name in self._columns:
+            column = getattr(table, name)
+            if name in self._codes:
+                code, values = self._codes[name], table.categories[name].values
+                column = array('i', (code(values[c]) if c >= 0 else c for c in column))
+            elif name == 'statement':
+                column = array('i', (s + self.statements for s in column))
+            getattr(self, name).extend(column)
+        self.statements += table.statements
+        return self
+
+    def truncate(self, length):
+        # drops the rows after length, their categories stay known
+        for name in self._columns:
+            del getattr(self, name)[length:]
+
+    def set_type(self, value):
+        # type of the last transaction, known only once its field 86 is parsed
+        self.type[-1] = self._codes['type'](value)
+
+    def arrays(self):
+        # zero-copy views, the table must not grow while they are in use
+        if numpy is None:
+            raise ImportError("numpy is required for array export")
+        return dict((name, numpy.frombuffer(getattr(self, name), dtype=getattr(self, name).typecode))
+                    for name in self._columns)
+
+    def signed_amounts(self):
+        arrays = self.arrays()
+        return arrays['amount'] * arrays['sign']
+
+    def totals_by_account(self):
+        # account -> signed total in minor units
+        arrays = self.arrays()
+        totals = numpy.zeros(len(self.categories['account']), dtype=numpy.int64)
+        numpy.add.at(totals, arrays['account'], arrays['amount'] * arrays['sign'])
+        return dict(zip(self.categories['account'].values, (int(t) for t in totals)))
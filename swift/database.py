@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sqlite3
+
+from .filters import statement_date
+from .values import minor_units
+
+# amounts are integer minor units, dates ISO strings
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS statements (
+        id INTEGER PRIMARY KEY, transaction_ref TEXT, account TEXT, number TEXT, date TEXT,
+        currency TEXT, opening_balance INTEGER, closing_balance INTEGER,
+        closing_available_balance INTEGER)""",
+    """CREATE TABLE IF NOT EXISTS transactions (
+        statement_id INTEGER, position INTEGER, value_date TEXT, entry_date TEXT,
+        amount INTEGER, sign TEXT, type_code TEXT, cust_ref TEXT, bank_ref TEXT,
+        type TEXT, type_name TEXT, vs TEXT, ss TEXT, ks TEXT, other_account TEXT,
+        other_name TEXT, other_ref TEXT, message TEXT)""",
+]
+
+# built after the rows are in, duplicates are skipped before inserting
+INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS statements_key ON statements (transaction_ref, account, number)",
+    "CREATE INDEX IF NOT EXISTS statements_account ON statements (account, date)",
+    "CREATE INDEX IF NOT EXISTS transactions_statement ON transactions (statement_id, position)",
+    "CREATE INDEX IF NOT EXISTS transactions_value_date ON transactions (value_date)",
+    "CREATE INDEX IF NOT EXISTS transactions_symbols ON transactions (vs, ks, ss)",
+]
+
+BALANCES = ('opening_balance', 'closing_balance', 'closing_available_balance')
+
+# field 86 attributes of the Taba transactions, NULL for other parsers
+DETAILS = ('vs', 'ss', 'ks', 'other_account', 'other_name', 'other_ref', 'message')
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+class SQLiteLoader(object):
+
+    def __init__(self, filename, batch_size=50000, scale=2):
+        # batch_size counts rows inserted per transaction
+        self.connection = sqlite3.connect(filename)
+        self.batch_size = batch_size
+        self.scale = scale
+        self.loaded = 0
+        self.skipped = 0
+        for statement in SCHEMA:
+            self.connection.execute(statement)
+
+        # keys of loaded statements, re-runs skip them
+        self._keys = set(self.connection.execute("SELECT transaction_ref, account, number FROM statements"))
+        self._next_id = self.connection.execute("SELECT COALESCE(MAX(id), 0) FROM statements").fetchone()[0] + 1
+        self._statements = []
+        self._transactions = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.flush()
+            self.create_indexes()
+        self.close()
+
+    def keys(self):
+        # loaded statement keys, pass as exclude filter so the parser drops
+        # them before their transactions, e.g. reader.iter_file(name, exclude=loader.keys())
+        return self._keys
+
+    def load(self, statements):
+        # returns the number of new statements, call create_indexes once
+        # all files are in
+        loaded = self.loaded + len(self._statements)
+        for statement in statements:
+            self.add(statement)
+        self.flush()
+        return self.loaded - loaded
+
+    def add(self, statement):
+        key = (statement.transaction_ref, statement.account, statement.number)
+        if key in self._keys:
+            self.skipped += 1
+            return False
+        self._keys.add(key)
+
+        statement_id = self._next_id
+        self._next_id += 1
+        balances = [getattr(statement, name, (None, None, None)) for name in BALANCES]
+        currency = next((b[1] for b in balances if b[1]), None)
+        self._statements.append((statement_id,) + key + (_iso(statement_date(statement)), currency) +
+                                tuple(self._amount(b[0]) for b in balances))
+
+        for position, t in enumerate(statement.transactions()):
+            type = getattr(t, 'type', None) or (None, None)
+            self._transactions.append((statement_id, position, _iso(t.value_date), _iso(t.entry_date),
+                self._amount(t.amount), t.sign, t.type_code, t.cust_ref, t.bank_ref, type[0], type[1]) +
+                tuple(getattr(t, name, None) for name in DETAILS))
+
+        if len(self._statements) + len(self._transactions) >= self.batch_size:
+            self.flush()
+        return True
+
+    def flush(self):
+        if not self._statements:
+            return
+        with self.connection:
+            self.connection.executemany("INSERT INTO statements VALUES (%s)" %
+                                        ','.join('?' * 9), self._statements)
+            self.connection.executemany("INSERT INTO transactions VALUES (%s)" %
+                                        ','.join('?' * (11 + len(DETAILS))), self._transactions)
+        self.loaded += len(self._statements)
+        self._statements = []
+        self._transactions = []
+
+    def create_indexes(self):
+        with self.connection:
+            for index in INDEXES:
+                self.connection.execute(index)
+
+    def close(self):
+        self.connection.close()
+
+    def _amount(self, amount):
+        return minor_units(amount, self.scale) if amount is not None else None
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import datetime
+
+from .values import to_date
+
+def statement_date(statement):
+    # opening balance date for MT940, statement date for MT942
+    value = getattr(statement, 'opening_balance', (None, None, None))[2] \
+        or getattr(statement, 'date', None)
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    return value
+
+
+class StatementFilter(object):
+
+    def __init__(self, account=None, number=None, date_from=None, date_to=None, exclude=None):
+        # account may be one account or a collection of them, dates are
+        # inclusive and compared with the statement date, exclude holds
+        # (transaction_ref, account, number) keys to drop and is not copied,
+        # so keys added while parsing apply to the following statements
+        if account is not None and not isinstance(account, (list, tuple, set, frozenset)):
+            account = (account,)
+        self.accounts = frozenset(account) if account is not None else None
+        self.number = str(number) if number is not None else None
+        self.date_from = date_from
+        self.date_to = date_to
+        self.exclude = exclude
+
+    def accepts(self, statement, value_61=None):
+        # called with the header fields parsed and, when the statement has
+        # transactions, the raw value of its first field 61
+        if self.accounts is not None and statement.account not in self.accounts:
+            return False
+        if self.number is not None and statement.number != self.number:
+            return False
+        if self.exclude and (statement.transaction_ref, statement.account, statement.number) in self.exclude:
+            return False
+        if self.date_from is not None or self.date_to is not None:
+            day = statement_date(statement)
+            if day is None and value_61:
+                try:
+                    day = to_date(value_61[:6])
+                except ValueError:
+                    pass
+            if day is None:
+                return False
+            if self.date_from is not None and day < self.date_from:
+                return False
+            if self.date_to is not None and day > self.date_to:
+                return False
+        return True
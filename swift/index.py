@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json, os
+
+from .filters import statement_date
+from .mapped import MappedReader, decode_range
+
+class IndexEntry(object):
+
+    __slots__ = ['start', 'end', 'transaction_ref', 'account', 'number', 'date']
+
+    def __init__(self, start, end, transaction_ref, account, number, date):
+        self.start = start
+        self.end = end
+        self.transaction_ref = transaction_ref
+        self.account = account
+        self.number = number
+        self.date = date
+
+    def to_json(self):
+        return [getattr(self, k) for k in self.__slots__]
+
+
+class StatementIndex(object):
+
+    _suffix = '.idx'
+    _version = 1
+
+    def __init__(self, parser, filename, entries=[]):
+        self._parser_class = parser
+        self.filename = filename
+        self.entries = list(entries)
+
+    @classmethod
+    def open(cls, parser, filename):
+        # loads the sidecar index when it is still valid, rebuilds it otherwise
+        index = cls.load(parser, filename)
+        if index is None:
+            index = cls.build(parser, filename)
+            index.save()
+        return index
+
+    @classmethod
+    def load(cls, parser, filename):
+        try:
+            with open(cls.index_filename(filename)) as file:
+                data = json.load(file)
+        except (IOError, ValueError):
+            return None
+
+        if data.get('version') != cls._version or data.get('parser') != cls._parser_key(parser) \
+                or data.get('source') != cls._source_key(filename):
+            return None
+
+        return cls(parser, filename, (IndexEntry(*e) for e in data['entries']))
+
+    @classmethod
+    def build(cls, parser, filename):
+        index = cls(parser, filename)
+        with MappedReader(parser, filename) as statements:
+            for handle in statements:
+                statement = handle.statement()
+                if statement is not None:
+                    index.entries.append(IndexEntry(handle.start, handle.end, statement.transaction_ref,
+                        statement.account, statement.number, cls._statement_date(statement)))
+        return index
+
+    def save(self):
+        data = {
+            'version': self._version,
+            'parser': self._parser_key(self._parser_class),
+            'source': self._source_key(self.filename),
+            'entries': [e.to_json() for e in self.entries],
+        }
+        filename = self.index_filename(self.filename)
+        with open(filename + '.tmp', 'w') as file:
+            json.dump(data, file)
+        os.rename(filename + '.tmp', filename)
+
+    def find(self, account=None, number=None, date_from=None, date_to=None):
+        # dates are inclusive, given as datetime.date or ISO strings
+        date_from = date_from and str(date_from)
+        date_to = date_to and str(date_to)
+        return [e for e in self.entries
+                if (account is None or e.account == account)
+                    and (number is None or e.number == str(number))
+                    and (date_from is None or (e.date and e.date >= date_from))
+                    and (date_to is None or (e.date and e.date <= date_to))]
+
+    def statements(self, **filters):
+        parser = self._parser_class()
+        with open(self.filename, 'rb') as file:
+            for entry in self.find(**filters):
+                file.seek(entry.start)
+                data = file.read(entry.end - entry.start)
+                for statement in parser.iter_statements(decode_range(data, self._parser_class, 0, len(data))):
+                    yield statement
+
+    @classmethod
+    def index_filename(cls, filename):
+        return filename + cls._suffix
+
+    @staticmethod
+    def _parser_key(parser):
+        return '%s.%s:%s' % (parser.__module__, parser.__name__, parser._version)
+
+    @staticmethod
+    def _source_key(filename):
+        stat = os.stat(filename)
+        return [stat.st_size, stat.st_mtime]
+
+    @staticmethod
+    def _statement_date(statement):
+        value = statement_date(statement)
+        return value.strftime('%Y-%m-%d') if value else None
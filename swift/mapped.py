@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import mmap, re
+
+from .MT940 import UnfinishedStatement
+
+_trailers = {}
+
+def _trailer_re(parser):
+    trailer = _trailers.get(parser._trailer)
+    if trailer is None:
+        trailer = re.compile(br'^[ \t]*' + re.escape(parser._trailer.encode('ascii')) + br'.*$\n?', re.M)
+        _trailers[parser._trailer] = trailer
+    return trailer
+
+def statement_ranges(data, parser, pos=0, endpos=None):
+    # yields (start, end) byte ranges of complete statements, a range ends
+    # right after its trailer line, ranges without any field are skipped
+    if endpos is None:
+        endpos = len(data)
+
+    start = pos
+    for m in _trailer_re(parser).finditer(data, pos, endpos):
+        if data.find(b':', start, m.start()) != -1:
+            yield start, m.end()
+        start = m.end()
+
+def decode_range(data, parser, start, end):
+    return data[start:end].decode(parser._encoding).split(u'\n')
+
+
+class LazyStatement(object):
+
+    __slots__ = ['start', 'end', '_reader', '_statement']
+
+    def __init__(self, reader, start, end):
+        self.start = start
+        self.end = end
+        self._reader = reader
+        self._statement = None
+
+    def raw(self):
+        return self._reader._data[self.start:self.end]
+
+    def statement(self):
+        if self._statement is None:
+            self._statement = self._reader._parse(self.start, self.end)
+        return self._statement
+
+
+class MappedReader(object):
+
+    def __init__(self, parser, filename, **options):
+        self._parser_class = parser
+        self._parser = self._parser_class(**options)
+        self._file = open(filename, 'rb')
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be mapped
+            self._data = b''
+
+        self._statements = []
+        end = 0
+        for start, end in statement_ranges(self._data, parser):
+            self._statements.append(LazyStatement(self, start, end))
+
+        if self._data.find(b':', end) != -1:
+            raise UnfinishedStatement("Statement trailer `%s` not found." % parser._trailer)
+
+    def __len__(self):
+        return len(self._statements)
+
+    def __getitem__(self, index):
+        return self._statements[index]
+
+    def __iter__(self):
+        return iter(self._statements)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def _parse(self, start, end):
+        lines = decode_range(self._data, self._parser_class, start, end)
+        for statement in self._parser.iter_statements(lines):
+            return statement
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from array import array
+from collections import deque, namedtuple
+from datetime import timedelta
+
+from .values import minor_units
+
+# key components after normalization, see transaction_key
+KEY_FIELDS = ('account', 'value_date', 'amount', 'vs', 'ks', 'ss', 'ref')
+
+Entry = namedtuple('Entry', 'account transaction key')
+Match = namedtuple('Match', 'intraday final')
+Conflict = namedtuple('Conflict', 'reason intraday final fields')
+
+def transaction_key(account, transaction, scale=2):
+    amount = minor_units(transaction.amount, scale)
+    if transaction.sign == '-':
+        amount = -amount
+    return (_account(account), transaction.value_date, amount, _symbol(getattr(transaction, 'vs', None)),
+            _symbol(getattr(transaction, 'ks', None)), _symbol(getattr(transaction, 'ss', None)),
+            _ref(transaction))
+
+def _account(account):
+    # Taba MT940 accounts are `prefix-number/bank`, MT942 has no prefix and
+    # always writes 000000, so both compare as (number, bank)
+    if account:
+        number, _, bank = account.partition('/')
+        if bank:
+            return (number.rpartition('-')[2].lstrip('0'), bank)
+    return account
+
+def _symbol(value):
+    # leading zeros of payment symbols are not significant
+    return (value.strip().lstrip('0') or None) if value else None
+
+def _ref(transaction):
+    ref = getattr(transaction, 'other_ref', None) or transaction.bank_ref
+    return (''.join(ref.split()).upper() or None) if ref else None
+
+def _entries(statements, scale):
+    for statement in statements:
+        for transaction in statement.transactions():
+            yield Entry(statement.account, transaction, transaction_key(statement.account, transaction, scale))
+
+def _entry_json(entry):
+    json = entry.transaction.to_json()
+    json['account'] = entry.account
+    return json
+
+
+class TransactionIndex(object):
+
+    # key components kept by the fuzzy buckets besides account, amount and
+    # value date, from the closest to the loosest: all but the reference,
+    # the reference only, nothing else
+    _tiers = ((3, 4, 5), (6,), ())
+
+    # entries by exact key and by every fuzzy tier, buckets hold positions
+    # in entries, used positions are dropped when they reach the front
+    def __init__(self, entries=()):
+        self.entries = []
+        self._used = array('b')
+        self._exact = {}
+        self._fuzzy = tuple({} for fields in self._tiers)
+        for entry in entries:
+            self.add(entry)
+
+    def add(self, entry):
+        position = len(self.entries)
+        self.entries.append(entry)
+        self._used.append(0)
+        key = entry.key
+        self._exact.setdefault(key, (position, deque()))[1].append(position)
+        for buckets, fields in zip(self._fuzzy, self._tiers):
+            buckets.setdefault(self._fuzzy_key(key, fields, key[1]), deque()).append(position)
+
+    @staticmethod
+    def _fuzzy_key(key, fields, day):
+        return (key[0], key[2], day) + tuple(key[i] for i in fields)
+
+    def _take(self, candidates):
+        # first unused position of a bucket, every position leaves a bucket
+        # once, so lookups stay amortized constant
+        while candidates:
+            position = candidates.popleft()
+            if not self._used[position]:
+                self._used[position] = 1
+                return self.entries[position]
+        return None
+
+    def exact(self, key):
+        # first unused entry with this key, in index order
+        return self._take(self._exact.get(key, (None, None))[1])
+
+    def first(self, key):
+        # first entry with this key, used or not
+        position = self._exact.get(key, (None,))[0]
+        return self.entries[position] if position is not None else None
+
+    def fuzzy(self, key, max_days=3):
+        # unused entry of the same account and amount within max_days, the
+        # closest tier wins, then the nearest value date
+        day = key[1]
+        days = [day] + [day + timedelta(days=sign * n) for n in range(1, max_days + 1) for sign in (-1, 1)]
+        for buckets, fields in zip(self._fuzzy, self._tiers):
+            for other in days:
+                found = self._take(buckets.get(self._fuzzy_key(key, fields, other)))
+                if found is not None:
+                    return found
+        return None
+
+    def unused(self):
+        return [e for e, used in zip(self.entries, self._used) if not used]
+
+
+class MatchReport(object):
+
+    def __init__(self, matched, unmatched_intraday, unmatched_final, conflicts):
+        self.matched = matched
+        self.unmatched_intraday = unmatched_intraday
+        self.unmatched_final = unmatched_final
+        self.conflicts = conflicts
+
+    def ok(self):
+        return not (self.unmatched_intraday or self.unmatched_final or self.conflicts)
+
+    def to_json(self):
+        return {
+            'matched': len(self.matched),
+            'unmatched_intraday': [_entry_json(e) for e in self.unmatched_intraday],
+            'unmatched_final': [_entry_json(e) for e in self.unmatched_final],
+            'conflicts': [{'reason': c.reason, 'fields': list(c.fields), 'intraday': _entry_json(c.intraday),
+                           'final': _entry_json(c.final)} for c in self.conflicts],
+        }
+
+
+def match(intraday, final, scale=2, max_days=3):
+    # matches intraday transactions (MT942 statements) against the final
+    # ones (MT940 statements); final is indexed, intraday streamed through
+    # the exact index first and the fuzzy buckets second, so a fuzzy pick
+    # never takes an entry another transaction matches exactly
+    index = TransactionIndex(_entries(final, scale))
+    matched, pending = [], []
+    for entry in _entries(intraday, scale):
+        found = index.exact(entry.key)
+        if found is not None:
+            matched.append(Match(entry, found))
+        else:
+            pending.append(entry)
+
+    unmatched, conflicts = [], []
+    for entry in pending:
+        # a used exact key means the intraday side repeats a transaction
+        found = index.first(entry.key)
+        if found is not None:
+            conflicts.append(Conflict('duplicate', entry, found, ()))
+            continue
+        found = index.fuzzy(entry.key, max_days)
+        if found is not None:
+            fields = tuple(name for name, a, b in zip(KEY_FIELDS, entry.key, found.key) if a != b)
+            conflicts.append(Conflict('changed', entry, found, fields))
+        else:
+            unmatched.append(entry)
+
+    return MatchReport(matched, unmatched, index.unused(), conflicts)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import mmap, multiprocessing
+
+from .MT940 import shift_lines
+from .mapped import _trailer_re, decode_range
+
+# smaller files are not worth the process pool
+MIN_SHARD_SIZE = 1 << 20
+
+def shard_ranges(data, parser, shards):
+    # splits data into about equally sized (start, end) byte ranges, every
+    # range but the last ends right after a trailer line
+    size = len(data)
+    trailer = _trailer_re(parser)
+    ranges = []
+    start = 0
+    for i in range(1, shards):
+        m = trailer.search(data, max(start, size * i // shards))
+        if m is None:
+            break
+        ranges.append((start, m.end()))
+        start = m.end()
+    if start < size:
+        ranges.append((start, size))
+    return ranges
+
+def parse_file(parser, filename, workers=None, statement_filter=None, **options):
+    # returns (statements, quarantine) in file order, stats and table given
+    # in options are updated with the results of all shards; None when a
+    # single shard or worker makes the pool pointless, the caller parses
+    # the file serially then
+    workers = workers or multiprocessing.cpu_count()
+    ranges = _file_ranges(parser, filename, workers)
+    if len(ranges) <= 1 or workers == 1:
+        return None
+    tasks = [(parser, _shard_options(options), filename, start, end, statement_filter)
+             for start, end in ranges]
+
+    pool = multiprocessing.Pool(min(workers, len(tasks)))
+    try:
+        results = pool.imap(_parse_shard, tasks)
+        statements, quarantine = _merge(results, options)
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return statements, quarantine
+
+def _file_ranges(parser, filename, workers):
+    with open(filename, 'rb') as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be mapped
+            return []
+        try:
+            # a few shards per worker even out statements of different size
+            shards = max(1, min(workers * 4, len(data) // MIN_SHARD_SIZE))
+            return shard_ranges(data, parser, shards)
+        finally:
+            data.close()
+
+def _shard_options(options):
+    # every shard collects into its own stats and table
+    options = dict(options)
+    if options.get('stats') is not None:
+        options['stats'] = type(options['stats'])()
+    if options.get('table') is not None:
+        options['table'] = type(options['table'])(options['table'].scale)
+    return options
+
+def _parse_shard(task):
+    parser, options, filename, start, end, statement_filter = task
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        data = file.read(end - start)
+
+    instance = parser(**options)
+    try:
+        statements = list(instance.iter_statements(decode_range(data, parser, 0, len(data)), statement_filter))
+        error = None
+    except Exception as e:
+        statements, error = None, e
+    return statements, error, instance.quarantine, instance.stats, instance.table, data.count(b'\n')
+
+def _merge(results, options):
+    # line numbers of every shard start at 1, they are shifted by the
+    # lines of the shards before it
+    statements, quarantine = [], []
+    offset = 0
+    for shard_statements, error, shard_quarantine, stats, table, lines in results:
+        if error is not None:
+            shift_lines(error, offset)
+            raise error
+        for record in shard_quarantine:
+            shift_lines(record, offset)
+        statements.extend(shard_statements)
+        quarantine.extend(shard_quarantine)
+        if stats is not None:
+            options['stats'].merge(stats)
+        if table is not None:
+            options['table'].extend(table)
+        offset += lines
+    return statements, quarantine
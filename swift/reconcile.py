@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from array import array
+from collections import namedtuple
+
+from .columnar import INT64, Categories, numpy
+from .values import minor_units
+
+BalanceMismatch = namedtuple('BalanceMismatch', 'index account number opening movement closing')
+ChainBreak = namedtuple('ChainBreak', 'account number next_number closing next_opening')
+NumberGap = namedtuple('NumberGap', 'account number next_number')
+
+
+class StatementTable(object):
+
+    # one row per MT940 statement, amounts in minor units; movements come
+    # from the columnar table filled while parsing the same statements
+    # (parser option table), without one they are summed per transaction
+    def __init__(self, scale=2, transactions=None):
+        if transactions is not None and transactions.scale != scale:
+            raise ValueError("Transaction table scale %d differs from %d" % (transactions.scale, scale))
+        self.scale = scale
+        self.transactions = transactions
+        self.accounts = Categories()
+        self.transaction_ref = []
+        self.account = array('i')
+        self.number = array('i')
+        self.opening = array(INT64)
+        self.closing = array(INT64)
+        self.opening_date = array('i')
+        self.year = array('i')
+        self.movement = array(INT64)
+
+    def __len__(self):
+        return len(self.account)
+
+    def add(self, statement):
+        scale = self.scale
+        opening, currency, opening_date = statement.opening_balance
+        closing = statement.closing_balance[0]
+
+        self.transaction_ref.append(statement.transaction_ref)
+        self.account.append(self.accounts.code(statement.account))
+        self.number.append(int(statement.number) if statement.number else -1)
+        self.opening.append(minor_units(opening, scale) if opening is not None else 0)
+        self.closing.append(minor_units(closing, scale) if closing is not None else 0)
+        self.opening_date.append(opening_date.toordinal() if opening_date else 0)
+        self.year.append(opening_date.year if opening_date else 0)
+        if self.transactions is None:
+            self.movement.append(self._movement(statement))
+
+    def _movement(self, statement):
+        scale = self.scale
+        movement = 0
+        for transaction in statement.transactions():
+            amount = minor_units(transaction.amount, scale)
+            movement += -amount if transaction.sign == '-' else amount
+        return movement
+
+    def movements(self):
+        # signed sum of the transactions of every row
+        table = self.transactions
+        if table is None:
+            return self.movement
+        if table.statements != len(self):
+            raise ValueError("Transaction table holds %d statements, expected %d" % (table.statements, len(self)))
+        if numpy is not None:
+            arrays = table.arrays()
+            movement = numpy.zeros(len(self), dtype=numpy.int64)
+            numpy.add.at(movement, arrays['statement'], arrays['amount'] * arrays['sign'])
+            return movement
+        movement = array(INT64, [0]) * len(self)
+        for statement, amount, sign in zip(table.statement, table.amount, table.sign):
+            movement[statement] += amount * sign
+        return movement
+
+    def extend(self, statements):
+        for statement in statements:
+            self.add(statement)
+        return self
+
+
+class ReconciliationReport(object):
+
+    def __init__(self, statements, mismatches, breaks, gaps):
+        self.statements = statements
+        self.mismatches = mismatches
+        self.breaks = breaks
+        self.gaps = gaps
+
+    def ok(self):
+        return not (self.mismatches or self.breaks or self.gaps)
+
+    def to_json(self):
+        return {
+            'statements': self.statements,
+            'mismatches': [m._asdict() for m in self.mismatches],
+            'breaks': [b._asdict() for b in self.breaks],
+            'gaps': [g._asdict() for g in self.gaps],
+        }
+
+
+def reconcile(statements, scale=2, transactions=None):
+    # checks opening + transactions == closing for every statement, and that
+    # consecutive statements of an account chain balances and 28C numbers;
+    # statements follow each other by opening date, numbers may restart at 1
+    # in a new year; transactions is the columnar table of the statements
+    table = statements if isinstance(statements, StatementTable) \
+        else StatementTable(scale, transactions).extend(statements)
+    if numpy is not None:
+        mismatches, breaks, gaps = _check_numpy(table)
+    else:
+        mismatches, breaks, gaps = _check_python(table)
+    return ReconciliationReport(len(table), mismatches, breaks, gaps)
+
+def _check_numpy(table):
+    account = numpy.frombuffer(table.account, dtype=table.account.typecode)
+    number = numpy.frombuffer(table.number, dtype=table.number.typecode)
+    opening = numpy.frombuffer(table.opening, dtype=table.opening.typecode)
+    closing = numpy.frombuffer(table.closing, dtype=table.closing.typecode)
+    movement = numpy.asarray(table.movements(), dtype=numpy.int64)
+    opening_date = numpy.frombuffer(table.opening_date, dtype=table.opening_date.typecode)
+    year = numpy.frombuffer(table.year, dtype=table.year.typecode)
+    accounts = table.accounts.values
+
+    mismatches = [BalanceMismatch(int(i), accounts[account[i]], int(number[i]),
+                                  int(opening[i]), int(movement[i]), int(closing[i]))
+                  for i in numpy.nonzero(opening + movement != closing)[0]]
+
+    order = numpy.lexsort((number, opening_date, account))
+    a, b = order[:-1], order[1:]
+    same = account[a] == account[b]
+    broken = same & (closing[a] != opening[b])
+    breaks = [ChainBreak(accounts[account[i]], int(number[i]), int(number[j]), int(closing[i]), int(opening[j]))
+              for i, j in zip(a[broken], b[broken])]
+    restarted = (number[b] == 1) & (year[b] != year[a])
+    skipped = same & (number[a] >= 0) & (number[b] != number[a] + 1) & ~restarted
+    gaps = [NumberGap(accounts[account[i]], int(number[i]), int(number[j]))
+            for i, j in zip(a[skipped], b[skipped])]
+    return mismatches, breaks, gaps
+
+def _check_python(table):
+    accounts = table.accounts.values
+    account, number, opening, closing = table.account, table.number, table.opening, table.closing
+    movement, year = table.movements(), table.year
+
+    mismatches = [BalanceMismatch(i, accounts[account[i]], number[i], opening[i], movement[i], closing[i])
+                  for i in range(len(table)) if opening[i] + movement[i] != closing[i]]
+
+    order = sorted(range(len(table)), key=lambda i: (account[i], table.opening_date[i], number[i]))
+    breaks, gaps = [], []
+    for i, j in zip(order, order[1:]):
+        if account[i] != account[j]:
+            continue
+        if closing[i] != opening[j]:
+            breaks.append(ChainBreak(accounts[account[i]], number[i], number[j], closing[i], opening[j]))
+        if number[i] >= 0 and number[j] != number[i] + 1 and not (number[j] == 1 and year[j] != year[i]):
+            gaps.append(NumberGap(accounts[account[i]], number[i], number[j]))
+    return mismatches, breaks, gaps
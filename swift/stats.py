@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+
+clock = getattr(time, 'perf_counter', time.time)
+
+class FieldStats(object):
+
+    __slots__ = ['calls', 'errors', 'total', 'max']
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def to_dict(self):
+        return dict((k, getattr(self, k)) for k in self.__slots__)
+
+
+class ParserStats(object):
+
+    def __init__(self):
+        self.fields = {}
+        self.statements = 0
+        self.transactions = 0
+
+    def field(self, tag):
+        tag = tag.lower()
+        try:
+            return self.fields[tag]
+        except KeyError:
+            field = self.fields[tag] = FieldStats()
+            return field
+
+    def wrap(self, tag, handler):
+        # the parser only calls this when stats are enabled, without stats
+        # its dispatch table holds the bare handlers
+        field = self.field(tag)
+
+        def timed(value, subfields=[]):
+            start = clock()
+            try:
+                return handler(value, subfields)
+            except Exception:
+                field.errors += 1
+                raise
+            finally:
+                elapsed = clock() - start
+                field.calls += 1
+                field.total += elapsed
+                if elapsed > field.max:
+                    field.max = elapsed
+
+        return timed
+
+    def merge(self, stats):
+        # adds the counters of stats collected by another parser
+        self.statements += stats.statements
+        self.transactions += stats.transactions
+        for tag, other in stats.fields.items():
+            field = self.field(tag)
+            field.calls += other.calls
+            field.errors += other.errors
+            field.total += other.total
+            if other.max > field.max:
+                field.max = other.max
+        return self
+
+    def to_dict(self):
+        return {
+            'statements': self.statements,
+            'transactions': self.transactions,
+            'fields': dict((tag, field.to_dict()) for tag, field in self.fields.items()),
+        }
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# declarative decoding of structured field 86 (`?NN` subfields)
+
+from .values import shared
+
+class Subfield(object):
+
+    __slots__ = ['code', 'attr', 'prefix', 'append', 'separator', 'shared', 'when', 'unless']
+
+    def __init__(self, code, attr, prefix='', append=False, separator='', shared=False, when={}, unless={}):
+        # attr None drops the subfield, when/unless map transaction
+        # attributes to the values the rule requires or excludes, shared
+        # values repeat across transactions and are kept once
+        self.code = code
+        self.attr = attr
+        self.prefix = prefix
+        self.append = append
+        self.separator = separator
+        self.shared = shared
+        self.when = tuple(when.items())
+        self.unless = tuple(unless.items())
+
+    def matches(self, transaction, line):
+        if self.prefix and not line.startswith(self.prefix, 3):
+            return False
+        for attr, values in self.when:
+            if getattr(transaction, attr, None) not in values:
+                return False
+        for attr, values in self.unless:
+            if getattr(transaction, attr, None) in values:
+                return False
+        return True
+
+
+class SubfieldSpec(object):
+
+    def __init__(self, rules):
+        # code -> rules in declaration order, the first matching rule wins
+        self._rules = {}
+        for rule in rules:
+            self._rules.setdefault(rule.code, []).append(rule)
+        for code, rules in self._rules.items():
+            self._rules[code] = tuple(rules)
+
+    def decode(self, transaction, lines):
+        rules = self._rules
+        parts = {}
+
+        for line in lines:
+            # empty subfields (`?NN`) and continuation text are skipped
+            if len(line) < 4 or line[0] != '?':
+                continue
+            for rule in rules.get(line[1:3], ()):
+                if rule.matches(transaction, line):
+                    if rule.attr is not None:
+                        value = line[3 + len(rule.prefix):]
+                        if rule.append:
+                            parts.setdefault(rule.attr, []).append(rule.separator + value)
+                        else:
+                            parts[rule.attr] = [shared(value) if rule.shared else value]
+                    break
+
+        # appended parts are joined once per attribute
+        for attr, values in parts.items():
+            setattr(transaction, attr, u''.join(values))
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import datetime, io, random
+
+# deterministic MT940/MT942 test data, roughly shaped like the Tatra banka
+# exports handled by swift.TabaSK
+
+NAMES = [u'Ján Novák', u'Žofia Kováčová', u'Ľubomír Šťastný', u'Mária Horváthová',
+         u'Peter Čierny', u'Dušan Ďurica', u'Slovenská pošta a.s.', u'Orange Slovensko a.s.']
+MESSAGES = [u'Platba za faktúru', u'Nájomné', u'Záloha na energie', u'Úhrada objednávky',
+            u'Príspevok', u'Členský poplatok', u'Vrátenie preplatku']
+TYPES = [('020', u'PLATBA'), ('030', u'INKASO'), ('040', u'TRVALY PRIKAZ'), ('110', u'POPLATOK')]
+CUST_REFS = ['NONREF', 'NONREF', 'NONREF', 'DEPOSIT', 'FEES', 'WITHDRAWAL', 'COLLECTION']
+
+HEADER = u'{1:F01TATRSKBXAXXX0000000000}{2:I%sTATRSKBXAXXXN}{3:{108:MT%s}}{4:'
+
+def _amount(value):
+    return (u'%.2f' % value).replace(u'.', u',')
+
+def _yymmdd(value):
+    return value.strftime('%y%m%d')
+
+
+class Generator(object):
+
+    def __init__(self, seed=0, start=datetime.date(2016, 10, 1), accounts=5):
+        self._random = random.Random(seed)
+        self.start = start
+        self.accounts = [u'%010d' % self._random.randint(10 ** 9, 10 ** 10 - 1) for i in range(accounts)]
+
+    def mt940(self, statements=10, transactions=20, taba=True):
+        # taba=False emits SWIFT blocks and no field 86, which the base
+        # MT940Parser does not handle
+        lines = []
+        for i in range(statements):
+            account = self.accounts[i % len(self.accounts)]
+            day = self.start + datetime.timedelta(days=i // len(self.accounts))
+            balance = self._random.randint(0, 10 ** 7) / 100.0
+
+            if taba:
+                lines.append(u':20:MC940%s00000' % _yymmdd(day))
+                lines.append(u':25:SK%02d1100000000%s' % (self._random.randint(10, 99), account))
+            else:
+                lines.append(HEADER % (u'940', u'940'))
+                lines.append(u':20:%s%05d' % (_yymmdd(day), i))
+                lines.append(u':25:1100/%s' % account)
+            lines.append(u':28C:%d/1' % (i // len(self.accounts) + 1))
+            lines.append(u':60F:%s%sEUR%s' % (u'C' if balance >= 0 else u'D', _yymmdd(day), _amount(abs(balance))))
+
+            for j in range(transactions):
+                amount, sign, cust_ref = self._transaction()
+                balance += amount if sign == u'C' else -amount
+                lines.append(u':61:%s%s%s%sNTRF%s' % (_yymmdd(day), day.strftime('%m%d'), sign, _amount(amount), cust_ref))
+                if taba:
+                    lines.extend(self._details_940())
+
+            lines.append(u':62F:%s%sEUR%s' % (u'C' if balance >= 0 else u'D', _yymmdd(day), _amount(abs(balance))))
+            lines.append(u'-' if taba else u'-}')
+        return lines
+
+    def mt942(self, statements=10, transactions=20):
+        lines = []
+        for i in range(statements):
+            account = self.accounts[i % len(self.accounts)]
+            day = self.start + datetime.timedelta(days=i // len(self.accounts))
+            lines.append(HEADER % (u'942', u'942'))
+            lines.append(u':20:%s-%02d.%02d' % (day.strftime('%Y-%m-%d'), 8 + i % 10, i % 60))
+            lines.append(u':25:1100/%s' % account)
+            lines.append(u':13:%s0800' % _yymmdd(day))
+            lines.append(u':34F:EURD0,')
+            lines.append(u':34F:EURC0,')
+
+            for j in range(transactions):
+                amount, sign, cust_ref = self._transaction()
+                lines.append(u':61:%s%s%s%sNTRF%s' % (_yymmdd(day), day.strftime('%m%d'), sign, _amount(amount), cust_ref))
+                lines.extend(self._details_942())
+
+            lines.append(u':90D:%dEUR0,' % transactions)
+            lines.append(u':90C:0EUR0,')
+            lines.append(u'-}')
+        return lines
+
+    def _transaction(self):
+        amount = self._random.randint(1, 500000) / 100.0
+        return amount, self._random.choice(u'CD'), self._random.choice(CUST_REFS)
+
+    def _symbols(self):
+        return (u'%d' % self._random.randint(1, 10 ** 8), u'%04d' % self._random.randint(0, 9999),
+                u'%04d' % self._random.choice([8, 308, 558, 1178]))
+
+    def _details_940(self):
+        code, name = self._random.choice(TYPES)
+        vs, ss, ks = self._symbols()
+        message = self._random.choice(MESSAGES)
+        lines = [u':86:%s?00%s' % (code, name), u'?20VS' + vs, u'?21SS' + ss, u'?22KS' + ks,
+                 u'?24' + message[:27], u'?25' + message[27:], u'?26', u'?27',
+                 u'?31SK%02d%020d' % (self._random.randint(10, 99), self._random.randint(0, 10 ** 12)),
+                 u'?32' + self._random.choice(NAMES)]
+        if self._random.random() < 0.3:
+            lines.append(u'?33' + self._random.choice(NAMES))
+        lines.append(u'?60/VS%s/SS%s/KS%s' % (vs, ss, ks))
+        return lines
+
+    def _details_942(self):
+        code, name = self._random.choice(TYPES)
+        vs, ss, ks = self._symbols()
+        message = self._random.choice(MESSAGES)
+        return [u':86:%s?00%s' % (code, name), u'?24/VS%s/SS%s/KS%s' % (vs, ss, ks),
+                u'?25' + message, u'?31%010d/1100' % self._random.randint(0, 10 ** 10 - 1),
+                u'?32' + self._random.choice(NAMES), u'?60' + message, u'?61' + self._random.choice(MESSAGES)]
+
+
+def write_file(filename, lines, encoding='ibm852'):
+    with io.open(filename, 'w', encoding=encoding, newline='\r\n') as file:
+        for line in lines:
+            file.write(line)
+            file.write(u'\n')
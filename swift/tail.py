@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from .MT940 import InvalidFieldValue, MissingFieldParser, NoTransaction, RunawayField, UnfinishedStatement, shift_lines
+from .mapped import decode_range
+
+class Checkpoint(object):
+
+    __slots__ = ['offset', 'lines', 'emitted', 'line']
+
+    def __init__(self, offset=0, lines=[], emitted=0, line=0):
+        # offset of the first byte not consumed yet, lines of the statement
+        # still open at that point, how many of its transactions were
+        # already returned and the number of file lines before the open ones
+        self.offset = offset
+        self.lines = list(lines)
+        self.emitted = emitted
+        self.line = line
+
+    def to_json(self):
+        return {'offset': self.offset, 'lines': self.lines, 'emitted': self.emitted, 'line': self.line}
+
+    @classmethod
+    def from_json(cls, json):
+        return cls(json['offset'], json['lines'], json['emitted'], json.get('line', 0))
+
+
+class IncrementalReader(object):
+
+    def __init__(self, parser, filename, checkpoint=None, **options):
+        self._parser_class = parser
+        self._parser = self._parser_class(**options)
+        # the open statement is peeked at with a parser of its own, so the
+        # shared table and stats only get finished statements
+        self._peeker = self._parser_class(**dict((k, v) for k, v in options.items()
+                                                 if k not in ('table', 'stats', 'tolerant')))
+        self.filename = filename
+        self.checkpoint = checkpoint or Checkpoint()
+
+    def poll(self):
+        # statements completed since the last call
+        end, finished, pending, line = self._feed()
+        self._commit(end, pending, 0, line)
+        return finished
+
+    def poll_transactions(self):
+        # (statement, transaction) pairs added since the last call, including
+        # those of the statement still being written
+        end, finished, pending, line = self._feed()
+        emitted = self.checkpoint.emitted
+        new = []
+
+        for statement in finished:
+            new.extend((statement, t) for t in statement.transactions()[emitted:])
+            emitted = 0
+
+        if pending:
+            statement = self._peek(pending)
+            if statement is not None:
+                # the last transaction may still get continuation lines
+                transactions = statement.transactions()[emitted:-1]
+                new.extend((statement, t) for t in transactions)
+                emitted += len(transactions)
+
+        self._commit(end, pending, emitted, line)
+        return new
+
+    def _read(self):
+        offset = self.checkpoint.offset
+        with open(self.filename, 'rb') as file:
+            file.seek(0, 2)
+            size = file.tell()
+            if size < offset:
+                # truncated or replaced, start over
+                self.checkpoint = Checkpoint()
+                offset = 0
+            file.seek(offset)
+            data = file.read(size - offset)
+
+        # an unterminated last line is left for the next call, the range
+        # ends with a newline so its last split item is always empty
+        end = data.rfind(b'\n') + 1
+        return offset + end, decode_range(data, self._parser_class, 0, end)[:-1]
+
+    def _feed(self):
+        end, lines = self._read()
+        trailer = self._parser._trailer
+        pending = list(self.checkpoint.lines)
+        offset = self.checkpoint.line
+        finished = []
+
+        # blank lines are kept so line numbers match the file
+        for line in lines:
+            line = line.strip()
+            pending.append(line)
+            if line.startswith(trailer):
+                finished.extend(self._parse(pending, offset))
+                offset += len(pending)
+                pending = []
+
+        return end, finished, pending, offset
+
+    def _parse(self, lines, offset):
+        quarantine = self._parser.quarantine
+        quarantined = len(quarantine)
+        try:
+            statements = list(self._parser.iter_statements(lines))
+        except Exception as e:
+            shift_lines(e, offset)
+            raise
+        for record in quarantine[quarantined:]:
+            shift_lines(record, offset)
+        return statements
+
+    def _peek(self, lines):
+        try:
+            for statement in self._peeker.iter_statements(lines + [self._parser._trailer]):
+                return statement
+        except (InvalidFieldValue, MissingFieldParser, NoTransaction, RunawayField, UnfinishedStatement):
+            pass
+
+    def _commit(self, end, pending, emitted, line):
+        self.checkpoint = Checkpoint(end, pending, emitted, line)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import datetime
+from decimal import Decimal
+from functools import total_ordering
+
+DATE_CACHE_SIZE = 4096
+
+_dates = {}
+
+def to_date(text):
+    # 'YYMMDD' -> date, statements repeat a handful of dates so they are
+    # memoized, the cache is simply dropped once it is full
+    try:
+        return _dates[text]
+    except KeyError:
+        if len(_dates) >= DATE_CACHE_SIZE:
+            _dates.clear()
+        value = _dates[text] = datetime.date(2000 + int(text[:2]), int(text[2:4]), int(text[4:6]))
+        return value
+
+SHARED_CACHE_SIZE = 65536
+
+_shared = {}
+
+def shared(value):
+    # one instance for equal strings and tuples repeated across transactions
+    # (currencies, categories, accounts), works for unicode on python 2
+    # unlike intern, dropped once full like the date cache
+    try:
+        return _shared[value]
+    except KeyError:
+        if len(_shared) >= SHARED_CACHE_SIZE:
+            _shared.clear()
+        _shared[value] = value
+        return value
+
+def to_decimal(text):
+    return Decimal(text.replace(',', '.'))
+
+def to_minor_units(text, scale=2):
+    # '123,45' -> 12345 without going through Decimal
+    whole, _, fraction = text.partition(',')
+    if len(fraction) > scale:
+        if fraction[scale:].strip('0'):
+            raise ValueError("Amount `%s` has more than %d decimal places" % (text, scale))
+        fraction = fraction[:scale]
+    return int(whole or '0') * 10 ** scale + int(fraction.ljust(scale, '0') or '0')
+
+
+@total_ordering
+class Money(object):
+
+    # fixed point amount stored as integer minor units
+    __slots__ = ['minor']
+
+    scale = 2
+
+    def __init__(self, minor=0):
+        self.minor = minor
+
+    @classmethod
+    def parse(cls, text):
+        return cls(to_minor_units(text, cls.scale))
+
+    @classmethod
+    def from_json(cls, value):
+        # inverse of the float written by MTJSONEncoder
+        return cls(int(round(value * 10 ** cls.scale)))
+
+    def to_decimal(self):
+        return Decimal(self.minor).scaleb(-self.scale)
+
+    def __float__(self):
+        return self.minor / float(10 ** self.scale)
+
+    def __neg__(self):
+        return type(self)(-self.minor)
+
+    def __abs__(self):
+        return type(self)(abs(self.minor))
+
+    def __add__(self, other):
+        if isinstance(other, Money):
+            return type(self)(self.minor + other.minor)
+        if other == 0:
+            # lets sum() start from 0
+            return self
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, Money):
+            return type(self)(self.minor - other.minor)
+        return NotImplemented
+
+    def __eq__(self, other):
+        return isinstance(other, Money) and self.minor == other.minor
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __lt__(self, other):
+        return self.minor < other.minor
+
+    def __hash__(self):
+        return hash(self.minor)
+
+    def __nonzero__(self):
+        return self.minor != 0
+
+    __bool__ = __nonzero__
+
+    def __str__(self):
+        return str(self.to_decimal())
+
+    def __repr__(self):
+        return "Money('%s')" % self
+
+
+def minor_units(amount, scale=2):
+    # Decimal or Money -> integer minor units
+    if isinstance(amount, Money):
+        return amount.minor * 10 ** (scale - amount.scale)
+    return int(amount.scaleb(scale).to_integral_value())